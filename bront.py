@@ -1,56 +1,212 @@
-from agents import (
-    Agent,
-    TResponseInputItem,
-    function_tool,
-    trace,
-    Runner,
-    WebSearchTool,
-)
 import asyncio
+import atexit
 import json
 import os
 import signal
 import sys
-from typing import Dict, Any
+from typing import TYPE_CHECKING
 from memory import Memory, MemoryNode, MemoryConnection
-from datetime import datetime
+from sqlite_memory import SqliteMemory
+
+if TYPE_CHECKING:
+    from agents import TResponseInputItem
 
 
 # Memory file configuration
 MEMORY_FILE = "bront_memory.json"
 
+# Database file used when BRONT_MEMORY_BACKEND=sqlite
+MEMORY_DB_FILE = "bront_memory.db"
+
+# Append-only journal holding mutations made since the last snapshot, so a
+# crash between debounced saves loses nothing.
+JOURNAL_FILE = "bront_memory.log"
+
 # Global memory instance
 long_term_memory: Memory = Memory()
 
+# Open journal handle (lazily created, line-buffered)
+_journal = None
+
+# The journal only exists to cover the JSON snapshot's flush window; the
+# SQLite backend persists every mutation itself.
+_journal_enabled = True
+
+
+def _open_journal():
+    global _journal
+    if _journal is None:
+        _journal = open(JOURNAL_FILE, "a", encoding="utf-8", buffering=1)
+    return _journal
+
+
+def append_mutation(op: dict) -> None:
+    """Record one mutation in the journal as a JSON line (O(mutation size))."""
+    if not _journal_enabled:
+        return
+    try:
+        _open_journal().write(json.dumps(op, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Error writing memory journal: {e}")
+
+
+def _journal_offset() -> int:
+    """Current size of the journal; entries past it postdate any snapshot."""
+    try:
+        return os.path.getsize(JOURNAL_FILE)
+    except OSError:
+        return 0
+
+
+def _truncate_journal(upto: "int | None" = None) -> None:
+    """
+    Drop journal entries that are now covered by a snapshot.
+
+    Pass the journal size captured before the snapshot payload was built:
+    entries appended while the snapshot was being serialized are kept for
+    the next flush instead of being deleted unseen. Without an offset the
+    whole file is dropped.
+    """
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+    try:
+        if upto is None:
+            os.remove(JOURNAL_FILE)
+            return
+        with open(JOURNAL_FILE, "rb") as f:
+            f.seek(upto)
+            remainder = f.read()
+        if remainder:
+            with open(JOURNAL_FILE, "wb") as f:
+                f.write(remainder)
+        else:
+            os.remove(JOURNAL_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def _apply_mutation(memory: Memory, op: dict) -> None:
+    """Re-apply one journaled mutation to a freshly loaded memory."""
+    kind = op.get("op")
+    if kind == "add_node":
+        memory.add_node(MemoryNode.from_dict(op["node"]))
+    elif kind == "add_connection":
+        try:
+            memory.add_connection(MemoryConnection.from_dict(op["connection"]))
+        except ValueError:
+            pass  # An endpoint was forgotten by a later journal entry
+    elif kind == "forget":
+        memory.remove_nodes(set(op["ids"]))
+    elif kind == "disconnect":
+        memory.remove_connections(op["from_id"], op["to_id"], op.get("type", ""))
+
+
+def _replay_journal(memory: Memory) -> int:
+    """Replay journaled mutations on top of the snapshot. Returns the count."""
+    replayed = 0
+    try:
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                _apply_mutation(memory, json.loads(line))
+                replayed += 1
+    except FileNotFoundError:
+        pass
+    return replayed
+
 
 def load_memory() -> None:
-    """Load long-term memory from JSON file."""
-    global long_term_memory
+    """Load long-term memory from the snapshot file plus any journal."""
+    global long_term_memory, _journal_enabled
+
+    if os.environ.get("BRONT_MEMORY_BACKEND") == "sqlite":
+        _journal_enabled = False
+        long_term_memory = SqliteMemory(MEMORY_DB_FILE)
+        print(f"Loaded {len(long_term_memory)} memory entries from {MEMORY_DB_FILE}")
+        return
+
     try:
         long_term_memory = Memory.load_from_file(MEMORY_FILE)
+        replayed = _replay_journal(long_term_memory)
         print(f"Loaded {len(long_term_memory)} memory entries from {MEMORY_FILE}")
+        if replayed:
+            print(f"Replayed {replayed} journaled mutations from {JOURNAL_FILE}")
+            _save_memory_sync()  # Compact the replayed journal into a snapshot
     except Exception as e:
         print(f"Error loading memory file: {e}")
         long_term_memory = Memory()
 
 
-def save_memory() -> None:
-    """Save long-term memory to JSON file."""
+def _save_memory_sync(fsync: bool = True) -> None:
+    """Save a full snapshot to the JSON file (blocking) and compact the journal."""
     try:
-        long_term_memory.save_to_file(MEMORY_FILE)
-        print(f"Saved {len(long_term_memory)} memory entries to {MEMORY_FILE}")
+        if _journal_enabled:
+            # A tool can journal a mutation while the snapshot is being
+            # written on a worker thread; only entries up to this point are
+            # guaranteed to be in the snapshot, so only these may be
+            # truncated.
+            upto = _journal_offset()
+            long_term_memory.save_to_file(MEMORY_FILE, fsync=fsync)
+            _truncate_journal(upto)
+            print(f"Saved {len(long_term_memory)} memory entries to {MEMORY_FILE}")
+        else:
+            # SQLite persists every mutation itself; just flush it, and
+            # leave any leftover JSON-mode journal alone so a later
+            # JSON-mode start can still replay it.
+            long_term_memory.save_to_file(MEMORY_FILE, fsync=fsync)
     except Exception as e:
         print(f"Error saving memory file: {e}")
 
 
+async def save_memory() -> None:
+    """Save long-term memory without blocking the event loop."""
+    # Debounced intermediate saves skip fsync; the journal plus the final
+    # fsynced shutdown save cover durability.
+    await asyncio.to_thread(_save_memory_sync, False)
+
+
+# How long the flusher waits after a mutation before writing, so bursts of
+# tool calls coalesce into a single serialization pass.
+SAVE_FLUSH_INTERVAL = 2.0
+
+# Set by tools after mutating memory; cleared by the flusher once written.
+_memory_dirty = asyncio.Event()
+
+
+def schedule_save() -> None:
+    """Mark memory dirty so the background flusher persists it shortly."""
+    _memory_dirty.set()
+
+
+async def memory_flusher() -> None:
+    """Background task that batches dirty-memory saves into periodic flushes."""
+    while True:
+        await _memory_dirty.wait()
+        await asyncio.sleep(SAVE_FLUSH_INTERVAL)
+        _memory_dirty.clear()
+        await save_memory()
+
+
 def signal_handler(signum, frame):
     """Handle shutdown signals to save memory before exit."""
     print("\nShutting down gracefully...")
-    save_memory()
+    _save_memory_sync()
     sys.exit(0)
 
 
-@function_tool
+def _flush_at_exit() -> None:
+    """Last-chance flush for exits that bypass the signal handlers."""
+    if _memory_dirty.is_set():
+        _save_memory_sync()
+
+
+atexit.register(_flush_at_exit)
+
+
 async def forget_memory(content_pattern: str, tags: list[str]) -> str:
     """
     Use this to forget specific memories. You can forget by content pattern or tags.
@@ -67,47 +223,27 @@ async def forget_memory(content_pattern: str, tags: list[str]) -> str:
 
     print(f"Forgetting memories with pattern: '{content_pattern}', tags: {tags}")
 
-    original_count = len(long_term_memory)
-    nodes_to_keep = []
-    connections_to_keep = []
-    forgotten_ids = set()
-
-    # Find nodes to forget
-    for node in long_term_memory.nodes:
-        should_forget = False
-
-        # Check content pattern
-        if content_pattern and content_pattern.lower() in node.content.lower():
-            should_forget = True
+    # Nodes carrying any of the tags come straight from the tag index
+    forgotten_ids = long_term_memory.ids_with_any_tag(tags) if tags else set()
 
-        # Check tags
-        if tags and set(tags).intersection(node.tags):
-            should_forget = True
+    # Content matches come from one substring scan over the content corpus
+    if content_pattern:
+        forgotten_ids |= long_term_memory.ids_matching_content(content_pattern)
 
-        if should_forget:
-            forgotten_ids.add(node.id)
-            print(f"Forgetting memory [{node.id}]: {node.content[:60]}...")
-        else:
-            nodes_to_keep.append(node)
-
-    # Keep connections that don't involve forgotten nodes
-    for conn in long_term_memory.connections:
-        if conn.from_id not in forgotten_ids and conn.to_id not in forgotten_ids:
-            connections_to_keep.append(conn)
+    for node_id in sorted(forgotten_ids):
+        node = long_term_memory.get_node(node_id)
+        print(f"Forgetting memory [{node.id}]: {node.content[:60]}...")
 
-    # Update memory
-    long_term_memory.nodes = nodes_to_keep
-    long_term_memory.connections = connections_to_keep
-    forgotten_count = original_count - len(long_term_memory)
+    forgotten_count = long_term_memory.remove_nodes(forgotten_ids)
 
     if forgotten_count > 0:
-        save_memory()  # Save after forgetting
+        append_mutation({"op": "forget", "ids": sorted(forgotten_ids)})
+        schedule_save()  # Save after forgetting
         return f"Forgot {forgotten_count} memory entries. {len(long_term_memory)} memories remain."
     else:
         return "No memories matched the criteria. Nothing was forgotten."
 
 
-@function_tool
 async def list_memory_tags() -> str:
     """
     Use this to get a list of all unique tags used in long-term memory.
@@ -124,26 +260,59 @@ async def list_memory_tags() -> str:
     return f"Available tags ({len(sorted_tags)}): {', '.join(sorted_tags)}"
 
 
-@function_tool
 async def get_user_input() -> str:
     """
     Use this to end the current turn and get user input.
     """
     print("=" * 20)
-    return input("> ")
+    # Run the blocking input() in a worker thread so the event loop stays
+    # free during human think-time.
+    return await asyncio.to_thread(input, "> ")
+
+
+# Rendered os.environ snapshot; rebuilt only when the environment changes
+# size, which is rare enough that a stale value is not a concern.
+_env_cache: "str | None" = None
+_env_cache_len = -1
 
 
-@function_tool
 async def get_env_info() -> str:
     """
     Use this to get information about the environment. This tool will return the current environment variables.
     """
-    import os
+    global _env_cache, _env_cache_len
+
+    if _env_cache is None or len(os.environ) != _env_cache_len:
+        _env_cache = str(os.environ)
+        _env_cache_len = len(os.environ)
+    return _env_cache
+
+
+def _read_file_sync(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
 
-    return str(os.environ)
+def _write_file_sync(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _diff_edit_sync(path: str, search: str, replace: str) -> str:
+    if search == replace:
+        return f"Search and replace text are identical for '{path}'. No changes made."
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    # One find plus slicing instead of str.replace's second full scan
+    index = content.find(search)
+    if index < 0:
+        return f"Search text not found in '{path}'. No changes made."
+    new_content = content[:index] + replace + content[index + len(search) :]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(new_content)
+    return f"Successfully replaced text in '{path}'."
 
 
-@function_tool
 async def read_file(path: str) -> str:
     """
     Use this to read the contents of a file.
@@ -151,13 +320,11 @@ async def read_file(path: str) -> str:
     Returns the file contents as a string, or an error message if the file cannot be read.
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return await asyncio.to_thread(_read_file_sync, path)
     except Exception as e:
         return f"Error reading file '{path}': {e}"
 
 
-@function_tool
 async def write_file(path: str, content: str) -> str:
     """
     Use this to write content to a file.
@@ -167,14 +334,12 @@ async def write_file(path: str, content: str) -> str:
     Returns a success or error message.
     """
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+        await asyncio.to_thread(_write_file_sync, path, content)
         return f"Successfully wrote to file '{path}'."
     except Exception as e:
         return f"Error writing to file '{path}': {e}"
 
 
-@function_tool
 async def diff_edit_file(path: str, search: str, replace: str) -> str:
     """
     Use this to edit a file by replacing a specific block of text.
@@ -184,43 +349,34 @@ async def diff_edit_file(path: str, search: str, replace: str) -> str:
     Returns a success or error message.
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            content = f.read()
-        if search not in content:
-            return f"Search text not found in '{path}'. No changes made."
-        new_content = content.replace(search, replace, 1)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(new_content)
-        return f"Successfully replaced text in '{path}'."
+        return await asyncio.to_thread(_diff_edit_sync, path, search, replace)
     except Exception as e:
         return f"Error editing file '{path}': {e}"
 
 
-@function_tool
 async def run_command(command: str) -> str:
     """
     Use this to run a shell command. This tool will execute the command and return its output.
     """
-    import subprocess
-
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    return result.stdout if result.returncode == 0 else result.stderr
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    return (stdout if proc.returncode == 0 else stderr).decode()
 
 
-@function_tool
 async def remember_memory(content: str, tags: list[str]) -> None:
     """
     Use this to remember something. This tool will store the content in long-term memory with optional tags.
     """
-    # Generate a unique ID for the new node
-    node_id = str(len(long_term_memory.nodes))
-    node = MemoryNode(id=node_id, content=content, tags=tags)
-    long_term_memory.add_node(node)
-    save_memory()  # Automatically save after adding new memory
+    node = long_term_memory.new_node(content, tags)
+    append_mutation({"op": "add_node", "node": node.to_dict()})
+    schedule_save()  # Automatically save after adding new memory
     print(f"Remembered: {content} with tags {tags}")
 
 
-@function_tool
 async def recall_memory(tags: list[str]) -> str:
     """
     Use this to recall something from long-term memory. This tool will return all entries that match the given tags,
@@ -251,7 +407,6 @@ async def recall_memory(tags: list[str]) -> str:
     return "\n".join(entries)
 
 
-@function_tool
 async def connect_memories(from_id: str, to_id: str, connection_type: str) -> str:
     """
     Use this to create a connection between two memories.
@@ -264,14 +419,14 @@ async def connect_memories(from_id: str, to_id: str, connection_type: str) -> st
             from_id=from_id, to_id=to_id, type=connection_type
         )
         long_term_memory.add_connection(connection)
-        save_memory()
+        append_mutation({"op": "add_connection", "connection": connection.to_dict()})
+        schedule_save()
         print(f"Created connection: {from_id} -> {to_id} ({connection_type})")
         return f"Created {connection_type} connection from memory {from_id} to memory {to_id}"
     except ValueError as e:
         return f"Error creating connection: {e}"
 
 
-@function_tool
 async def disconnect_memories(
     from_id: str, to_id: str, connection_type: str = ""
 ) -> str:
@@ -286,26 +441,21 @@ async def disconnect_memories(
         + (f" ({connection_type})" if connection_type else "")
     )
 
-    original_count = len(long_term_memory.connections)
-    connections_to_keep = []
-
-    for conn in long_term_memory.connections:
-        should_remove = False
-
-        # Check if this connection matches the criteria
-        if conn.from_id == from_id and conn.to_id == to_id:
-            if not connection_type or conn.type == connection_type:
-                should_remove = True
-
-        if not should_remove:
-            connections_to_keep.append(conn)
-
-    long_term_memory.connections = connections_to_keep
-    removed_count = original_count - len(long_term_memory.connections)
+    removed_count = long_term_memory.remove_connections(
+        from_id, to_id, connection_type
+    )
 
     if removed_count > 0:
         print(f"Removed {removed_count} connection(s)")
-        save_memory()
+        append_mutation(
+            {
+                "op": "disconnect",
+                "from_id": from_id,
+                "to_id": to_id,
+                "type": connection_type,
+            }
+        )
+        schedule_save()
         if connection_type:
             return f"Removed {removed_count} '{connection_type}' connection(s) from memory {from_id} to memory {to_id}"
         else:
@@ -317,7 +467,6 @@ async def disconnect_memories(
         )
 
 
-@function_tool
 async def list_memory_connections() -> str:
     """
     List all memory connections.
@@ -332,37 +481,45 @@ async def list_memory_connections() -> str:
     return "\n".join(connection_lines)
 
 
-@function_tool
 async def end_session() -> str:
     """
     Use this to end the current session. This will save the memory and exit the program. Be sure to commit important memories and connect them before calling this.
     """
     print("Ending session and saving memory...")
-    save_memory()
+    _save_memory_sync()
     sys.exit(0)
 
 
-bront = Agent(
-    name="Bront",
-    tools=[
-        get_user_input,
-        get_env_info,
-        run_command,
-        remember_memory,
-        recall_memory,
-        forget_memory,
-        list_memory_tags,
-        list_memory_connections,
-        connect_memories,
-        disconnect_memories,
-        read_file,
-        write_file,
-        diff_edit_file,
-        end_session,
-        WebSearchTool(),
-    ],
-)
-context: list[TResponseInputItem] = []
+def build_agent():
+    """Construct the agent, importing the SDK only when it is needed."""
+    # The agents SDK is by far the slowest import in the program, so it is
+    # deferred until here; tools above are plain coroutines wrapped with
+    # function_tool at build time for the same reason.
+    from agents import Agent, WebSearchTool, function_tool
+
+    return Agent(
+        name="Bront",
+        tools=[
+            function_tool(get_user_input),
+            function_tool(get_env_info),
+            function_tool(run_command),
+            function_tool(remember_memory),
+            function_tool(recall_memory),
+            function_tool(forget_memory),
+            function_tool(list_memory_tags),
+            function_tool(list_memory_connections),
+            function_tool(connect_memories),
+            function_tool(disconnect_memories),
+            function_tool(read_file),
+            function_tool(write_file),
+            function_tool(diff_edit_file),
+            function_tool(end_session),
+            WebSearchTool(),
+        ],
+    )
+
+
+context: "list[TResponseInputItem]" = []
 
 
 async def main():
@@ -375,6 +532,13 @@ async def main():
     # Load memory at startup
     load_memory()
 
+    from agents import Runner, trace
+
+    bront = build_agent()
+
+    # Persist mutations in the background instead of on every tool call
+    flusher_task = asyncio.create_task(memory_flusher())
+
     # Initialize context with memory information
     context = [
         {
@@ -412,11 +576,11 @@ You can use the web search tool to find information online. Use it when you need
                 context = result.to_input_list()
     except KeyboardInterrupt:
         print("\nShutting down gracefully...")
-        save_memory()
+        _save_memory_sync()
         sys.exit(0)
     except Exception as e:
         print(f"Unexpected error: {e}")
-        save_memory()  # Save memory even on unexpected errors
+        _save_memory_sync()  # Save memory even on unexpected errors
         raise
 
 
@@ -1,20 +1,110 @@
+import json
+import mmap
+import os
+import sys
+import tempfile
+from bisect import bisect_right
+from collections import defaultdict
+
+try:
+    import orjson
+except ImportError:  # Optional C-backed codec; stdlib json works fine without it
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Optional streaming parser for loading large files
+    ijson = None
+
+
+# Freelist of recycled MemoryNode instances: forgetting refills it so a
+# following remember can reuse an object instead of allocating a fresh one.
+_NODE_POOL_MAX = 256
+_node_pool: list["MemoryNode"] = []
+
+
+def _id_sort_key(node_id: str) -> tuple:
+    """
+    Chronological sort key for node IDs. Minted IDs are numeric and
+    monotonic, so numeric order is insertion order; any non-numeric legacy
+    ID sorts after them, lexicographically.
+    """
+    try:
+        return (0, int(node_id), "")
+    except ValueError:
+        return (1, 0, node_id)
+
+
 class MemoryNode:
+    __slots__ = (
+        "id",
+        "content",
+        "tags",
+        "_content_cf",
+        "_tag_set",
+        "_cached_dict",
+        "_cached_row",
+    )
+
     def __init__(self, id: str, content: str, tags: list[str]):
         self.id = id
+        # Interned so nodes sharing a tag share the same str object, which
+        # shrinks RAM and lets set operations hit the identity fast path.
+        self.tags = [sys.intern(tag) for tag in tags]
         self.content = content
-        self.tags = tags
+        # Filled on first use; many nodes are never content-searched
+        self._content_cf: "str | None" = None
+        self._tag_set = frozenset(self.tags)
+        # Serialization payloads, built lazily and reused across saves
+        self._cached_dict: "dict | None" = None
+        self._cached_row: "list | None" = None
+
+    @classmethod
+    def create(cls, id: str, content: str, tags: list[str]) -> "MemoryNode":
+        """Build a node, reusing a recycled instance when one is available."""
+        if _node_pool:
+            node = _node_pool.pop()
+            node.__init__(id, content, tags)
+            return node
+        return cls(id, content, tags)
+
+    @property
+    def content_casefold(self) -> str:
+        """Casefolded content for case-insensitive matching, cached lazily."""
+        if self._content_cf is None:
+            self._content_cf = self.content.casefold()
+        return self._content_cf
+
+    @property
+    def tag_set(self) -> frozenset:
+        """The node's tags as a frozenset, for cheap intersection tests."""
+        return self._tag_set
 
     def to_dict(self) -> dict:
         """Convert MemoryNode to dictionary for JSON serialization."""
-        return {"id": self.id, "content": self.content, "tags": self.tags}
+        if self._cached_dict is None:
+            self._cached_dict = {
+                "id": self.id,
+                "content": self.content,
+                "tags": self.tags,
+            }
+        return self._cached_dict
+
+    def to_row(self) -> list:
+        """The node as a [id, content, tags] row for the columnar format."""
+        if self._cached_row is None:
+            self._cached_row = [self.id, self.content, self.tags]
+        return self._cached_row
 
     @classmethod
     def from_dict(cls, data: dict) -> "MemoryNode":
         """Create MemoryNode from dictionary (JSON deserialization)."""
-        return cls(id=data["id"], content=data["content"], tags=data["tags"])
+        return cls.create(id=data["id"], content=data["content"], tags=data["tags"])
 
 
 class MemoryConnection:
+    __slots__ = ("from_id", "to_id", "type")
+
     def __init__(self, from_id: str, to_id: str, type: str):
         self.from_id = from_id
         self.to_id = to_id
@@ -32,29 +122,211 @@ class MemoryConnection:
 
 class Memory:
     def __init__(self):
-        self.nodes: list[MemoryNode] = []
-        self.connections: list[MemoryConnection] = []
+        # Primary storage: insertion-ordered maps, so removals are O(1)
+        # dict deletes instead of list rebuilds.
+        self._node_by_id: dict[str, MemoryNode] = {}
+        self._conn_map: dict[int, MemoryConnection] = {}
+        # Secondary indexes kept in sync with the maps above so lookups
+        # don't have to scan every node.
+        self._tag_index: dict[str, set[str]] = {}
+        self._out_edges: dict[str, list[MemoryConnection]] = {}
+        self._in_edges: dict[str, list[MemoryConnection]] = {}
+        # Next value for minted node IDs; monotonic so forgotten IDs are
+        # never reused for new memories.
+        self._next_id = 0
+        # Lazily built concatenation of all casefolded contents, so content
+        # searches run one C-level substring scan instead of a Python loop.
+        self._corpus: "str | None" = None
+        self._corpus_starts: list[int] = []
+        self._corpus_ends: list[int] = []
+        self._corpus_ids: list[str] = []
+
+    @property
+    def nodes(self) -> list[MemoryNode]:
+        """The stored nodes, in insertion order."""
+        return list(self._node_by_id.values())
+
+    @property
+    def connections(self) -> list[MemoryConnection]:
+        """The stored connections, in insertion order."""
+        return list(self._conn_map.values())
 
     def add_node(self, node: MemoryNode) -> None:
         """Add a node to the memory."""
-        self.nodes.append(node)
+        self._node_by_id[node.id] = node
+        for tag in node.tags:
+            self._tag_index.setdefault(tag, set()).add(node.id)
+        self._corpus = None
+        # Keep the ID counter ahead of any numeric ID we see
+        try:
+            numeric_id = int(node.id)
+        except ValueError:
+            return
+        if numeric_id >= self._next_id:
+            self._next_id = numeric_id + 1
+
+    def next_id(self) -> str:
+        """Mint a fresh node ID that can never collide with an existing one."""
+        node_id = str(self._next_id)
+        self._next_id += 1
+        return node_id
+
+    def new_node(self, content: str, tags: list[str]) -> MemoryNode:
+        """Create, store, and return a node with a freshly minted ID."""
+        node = MemoryNode.create(self.next_id(), content, tags)
+        self.add_node(node)
+        return node
+
+    def get_node(self, node_id: str) -> "MemoryNode | None":
+        """Look up a node by its ID."""
+        return self._node_by_id.get(node_id)
+
+    # Below this many nodes a plain per-node scan beats maintaining the corpus
+    _CORPUS_MIN_NODES = 64
+
+    def _build_corpus(self) -> None:
+        """Concatenate all casefolded contents, separated by NUL bytes."""
+        parts: list[str] = []
+        self._corpus_starts = []
+        self._corpus_ends = []
+        self._corpus_ids = []
+        pos = 0
+        for node in self._node_by_id.values():
+            text = node.content_casefold
+            parts.append(text)
+            self._corpus_starts.append(pos)
+            self._corpus_ends.append(pos + len(text))
+            self._corpus_ids.append(node.id)
+            pos += len(text) + 1  # account for the separator
+        self._corpus = "\x00".join(parts)
+
+    def ids_matching_content(self, pattern: str) -> set[str]:
+        """
+        Return the IDs of nodes whose content contains the given pattern,
+        case-insensitively.
+        """
+        pattern_cf = pattern.casefold()
+        # Small memories (or pathological patterns that could cross the NUL
+        # separators) use the straightforward per-node scan.
+        if (
+            len(self._node_by_id) < self._CORPUS_MIN_NODES
+            or not pattern_cf
+            or "\x00" in pattern_cf
+        ):
+            return {
+                node.id
+                for node in self._node_by_id.values()
+                if pattern_cf in node.content_casefold
+            }
+
+        if self._corpus is None:
+            self._build_corpus()
+
+        matched: set[str] = set()
+        start = 0
+        while True:
+            hit = self._corpus.find(pattern_cf, start)
+            if hit < 0:
+                break
+            index = bisect_right(self._corpus_starts, hit) - 1
+            matched.add(self._corpus_ids[index])
+            # Skip the rest of this node; one match per node is enough
+            start = self._corpus_ends[index] + 1
+        return matched
+
+    def ids_with_any_tag(self, tags: list[str]) -> set[str]:
+        """Return the IDs of nodes carrying at least one of the given tags."""
+        ids: set[str] = set()
+        for tag in tags:
+            posting = self._tag_index.get(tag)
+            if posting:
+                ids |= posting
+        return ids
+
+    def remove_nodes(self, ids: set[str]) -> int:
+        """Remove the given nodes and any connections touching them."""
+        ids = set(ids) & self._node_by_id.keys()
+        if not ids:
+            return 0
+        self._corpus = None
+
+        for node_id in ids:
+            node = self._node_by_id.pop(node_id)
+            for tag in node.tags:
+                posting = self._tag_index.get(tag)
+                if posting is not None:
+                    posting.discard(node_id)
+                    if not posting:
+                        del self._tag_index[tag]
+            if len(_node_pool) < _NODE_POOL_MAX:
+                _node_pool.append(node)
+
+        # Cascade through the adjacency indexes so the cost is proportional
+        # to the degree of the removed nodes, not the total edge count.
+        dropped: set[int] = set()
+        for node_id in ids:
+            for conn in self._out_edges.pop(node_id, []):
+                dropped.add(id(conn))
+                peer = self._in_edges.get(conn.to_id)
+                if peer is not None and conn in peer:
+                    peer.remove(conn)
+            for conn in self._in_edges.pop(node_id, []):
+                dropped.add(id(conn))
+                peer = self._out_edges.get(conn.from_id)
+                if peer is not None and conn in peer:
+                    peer.remove(conn)
+
+        for conn_id in dropped:
+            del self._conn_map[conn_id]
+        return len(ids)
+
+    def _index_connection(self, connection: MemoryConnection) -> None:
+        """Register a connection in the adjacency indexes."""
+        self._out_edges.setdefault(connection.from_id, []).append(connection)
+        self._in_edges.setdefault(connection.to_id, []).append(connection)
+
+    def _add_connection_unchecked(self, connection: MemoryConnection) -> None:
+        """Store and index a connection without endpoint validation."""
+        self._conn_map[id(connection)] = connection
+        self._index_connection(connection)
 
     def add_connection(self, connection: MemoryConnection) -> None:
         """Add a connection between nodes in the memory."""
         # Make sure both nodes exist before adding the connection
-        if any(n.id == connection.from_id for n in self.nodes) and any(
-            n.id == connection.to_id for n in self.nodes
+        if (
+            connection.from_id in self._node_by_id
+            and connection.to_id in self._node_by_id
         ):
-            self.connections.append(connection)
+            self._add_connection_unchecked(connection)
         else:
             raise ValueError("Both nodes must exist in memory to create a connection.")
 
+    def remove_connections(
+        self, from_id: str, to_id: str, connection_type: str = ""
+    ) -> int:
+        """
+        Remove connections from one node to another, optionally filtered by
+        type. Returns the number of connections removed.
+        """
+        matches = [
+            c
+            for c in self._out_edges.get(from_id, [])
+            if c.to_id == to_id and (not connection_type or c.type == connection_type)
+        ]
+        if not matches:
+            return 0
+
+        for conn in matches:
+            self._out_edges[from_id].remove(conn)
+            peer = self._in_edges.get(to_id)
+            if peer is not None and conn in peer:
+                peer.remove(conn)
+            del self._conn_map[id(conn)]
+        return len(matches)
+
     def get_tags(self) -> list[str]:
         """Get all unique tags from the memory nodes."""
-        tags = set()
-        for node in self.nodes:
-            tags.update(node.tags)
-        return list(tags)
+        return list(self._tag_index)
 
     def recall(self, tags: list[str]) -> list[tuple]:
         """
@@ -66,35 +338,32 @@ class Memory:
         - connections: List of connection details (only for related nodes)
           Each connection is a tuple of (connection_type, connected_node_id)
         """
-        # Find nodes that match the given tags
-        matched_nodes = []
-        matched_ids = set()
-        for node in self.nodes:
-            if set(tags).intersection(node.tags):
-                matched_nodes.append(node)
-                matched_ids.add(node.id)
+        # Find nodes that match the given tags via the inverted index.
+        # Set iteration order is hash-randomized, so sort the IDs back into
+        # chronological order before building the result.
+        matched_ids = self.ids_with_any_tag(tags)
+        ordered_ids = sorted(matched_ids, key=_id_sort_key)
+        matched_nodes = [self._node_by_id[node_id] for node_id in ordered_ids]
 
-        # Create a lookup dictionary for better performance
-        node_lookup = {node.id: node for node in self.nodes}
+        node_lookup = self._node_by_id
 
         # Prepare result list with direct matches
         result = [(node, True, []) for node in matched_nodes]
 
-        # Find and add related nodes with connection information
-        related_nodes = {}  # Dictionary to track related nodes and their connections
+        # Find and add related nodes by walking only the matched nodes'
+        # adjacency lists instead of the whole connection list
+        related_nodes = defaultdict(list)  # Tracks related nodes and their connections
 
-        for conn in self.connections:
-            # Check connections from matched nodes to other nodes
-            if conn.from_id in matched_ids and conn.to_id not in matched_ids:
-                if conn.to_id not in related_nodes:
-                    related_nodes[conn.to_id] = []
-                related_nodes[conn.to_id].append((conn.type, conn.from_id))
+        for node_id in ordered_ids:
+            # Connections from matched nodes to other nodes
+            for conn in self._out_edges.get(node_id, ()):
+                if conn.to_id not in matched_ids:
+                    related_nodes[conn.to_id].append((conn.type, conn.from_id))
 
-            # Check connections from other nodes to matched nodes
-            elif conn.to_id in matched_ids and conn.from_id not in matched_ids:
-                if conn.from_id not in related_nodes:
-                    related_nodes[conn.from_id] = []
-                related_nodes[conn.from_id].append((conn.type, conn.to_id))
+            # Connections from other nodes to matched nodes
+            for conn in self._in_edges.get(node_id, ()):
+                if conn.from_id not in matched_ids:
+                    related_nodes[conn.from_id].append((conn.type, conn.to_id))
 
         # Add related nodes to result
         for node_id, connections in related_nodes.items():
@@ -105,48 +374,193 @@ class Memory:
 
     def __len__(self) -> int:
         """Return the number of nodes in memory."""
-        return len(self.nodes)
+        return len(self._node_by_id)
 
     def __iter__(self):
         """Make Memory iterable over nodes."""
-        return iter(self.nodes)
+        return iter(self._node_by_id.values())
+
+    # Column order for the version-2 on-disk format
+    NODE_KEYS = ("id", "content", "tags")
+    CONNECTION_KEYS = ("from_id", "to_id", "type")
 
     def to_dict(self) -> dict:
-        """Convert Memory to dictionary for JSON serialization."""
+        """
+        Convert Memory to dictionary for JSON serialization.
+
+        Nodes and connections are homogeneous records, so they are stored
+        columnar (one key list plus value rows) instead of repeating the
+        same keys in every record.
+        """
+        # Snapshot each dict view in a single C-level list() call first, so
+        # a save running on a worker thread never sees a mutation land
+        # mid-iteration ("dictionary changed size during iteration").
+        nodes = list(self._node_by_id.values())
+        connections = list(self._conn_map.values())
         return {
-            "nodes": [node.to_dict() for node in self.nodes],
-            "connections": [conn.to_dict() for conn in self.connections],
+            "format": 2,
+            "next_id": self._next_id,
+            "nodes": {
+                "keys": list(self.NODE_KEYS),
+                "rows": [node.to_row() for node in nodes],
+            },
+            "connections": {
+                "keys": list(self.CONNECTION_KEYS),
+                "rows": [
+                    [conn.from_id, conn.to_id, conn.type]
+                    for conn in connections
+                ],
+            },
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> "Memory":
         """Create Memory from dictionary (JSON deserialization)."""
         memory = cls()
-        memory.nodes = [
-            MemoryNode.from_dict(node_data) for node_data in data.get("nodes", [])
-        ]
-        memory.connections = [
-            MemoryConnection.from_dict(conn_data)
-            for conn_data in data.get("connections", [])
-        ]
+        if data.get("format", 1) >= 2:
+            memory._next_id = int(data.get("next_id", 0))
+            node_keys = data["nodes"]["keys"]
+            for row in data["nodes"]["rows"]:
+                memory.add_node(MemoryNode.from_dict(dict(zip(node_keys, row))))
+            conn_keys = data["connections"]["keys"]
+            for row in data["connections"]["rows"]:
+                memory._add_connection_unchecked(
+                    MemoryConnection.from_dict(dict(zip(conn_keys, row)))
+                )
+        else:
+            # Legacy format 1: list of per-record dicts
+            for node_data in data.get("nodes", []):
+                memory.add_node(MemoryNode.from_dict(node_data))
+            for conn_data in data.get("connections", []):
+                memory._add_connection_unchecked(MemoryConnection.from_dict(conn_data))
         return memory
 
-    def save_to_file(self, filepath: str) -> None:
-        """Save memory to JSON file."""
-        import json
+    def save_to_file(
+        self, filepath: str, fsync: bool = True, pretty: bool = False
+    ) -> None:
+        """
+        Save memory to JSON file.
+
+        The payload is written to a uniquely named sibling temp file and
+        swapped in with os.replace, so an interrupted save can never leave
+        a truncated snapshot behind and concurrent saves (a shutdown save
+        racing a background flush) never write through the same temp file. Pass fsync=False on frequent intermediate saves
+        to skip the disk barrier; the final shutdown save should keep it.
+        Routine saves are compact — pass pretty=True only for a
+        human-readable export, since stdlib json's indent path falls off
+        the C encoder.
+        """
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if pretty else 0
+            payload = orjson.dumps(self.to_dict(), option=option)
+        elif pretty:
+            payload = json.dumps(
+                self.to_dict(), indent=2, ensure_ascii=False
+            ).encode("utf-8")
+        else:
+            payload = json.dumps(
+                self.to_dict(), ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filepath)),
+            prefix=os.path.basename(filepath) + ".",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    # Snapshots larger than this stream-parse instead of decoding the whole
+    # document, trading a little parse speed for flat peak memory.
+    STREAM_THRESHOLD = 32 * 1024 * 1024
+
+    @classmethod
+    def _load_streaming(cls, filepath: str) -> "Memory":
+        """
+        Load memory by stream-parsing the JSON file with ijson.
+
+        Records are built one at a time straight into the Memory instance,
+        so peak memory stays at the size of the final object graph instead
+        of also holding the fully decoded JSON document.
+        """
+        memory = cls()
+        # Column names seen in the file (format 2); falls back to the
+        # class defaults when absent.
+        section_keys: dict[str, list] = {"nodes": [], "connections": []}
+        default_keys = {
+            "nodes": list(cls.NODE_KEYS),
+            "connections": list(cls.CONNECTION_KEYS),
+        }
+        # Prefixes at which one record starts, for both file formats
+        item_prefixes = {
+            "nodes.item": "nodes",  # format 1
+            "nodes.rows.item": "nodes",  # format 2
+            "connections.item": "connections",
+            "connections.rows.item": "connections",
+        }
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        builder = None
+        builder_prefix = None
+        with open(filepath, "rb") as f:
+            for prefix, event, value in ijson.parse(f):
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == builder_prefix and event in ("end_array", "end_map"):
+                        section = item_prefixes[builder_prefix]
+                        record = builder.value
+                        if isinstance(record, list):
+                            keys = section_keys[section] or default_keys[section]
+                            record = dict(zip(keys, record))
+                        if section == "nodes":
+                            memory.add_node(MemoryNode.from_dict(record))
+                        else:
+                            memory._add_connection_unchecked(
+                                MemoryConnection.from_dict(record)
+                            )
+                        builder = None
+                elif prefix in item_prefixes and event in ("start_map", "start_array"):
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    builder_prefix = prefix
+                elif prefix in ("nodes.keys.item", "connections.keys.item"):
+                    section_keys[prefix.split(".", 1)[0]].append(value)
+                elif prefix == "next_id":
+                    memory._next_id = max(memory._next_id, int(value))
+        return memory
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "Memory":
         """Load memory from JSON file."""
-        import json
-        import os
-
         if not os.path.exists(filepath):
             return cls()  # Return empty memory if file doesn't exist
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if ijson is not None and os.path.getsize(filepath) > cls.STREAM_THRESHOLD:
+            return cls._load_streaming(filepath)
+
+        if orjson is not None:
+            with open(filepath, "rb") as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # Empty files cannot be mapped
+                    data = orjson.loads(f.read())
+                else:
+                    # Parse straight out of the page cache instead of
+                    # copying the whole file into a bytes object first;
+                    # orjson takes a buffer, not the mmap object itself.
+                    with mm:
+                        data = orjson.loads(memoryview(mm))
+        else:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
         return cls.from_dict(data)
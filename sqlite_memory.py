@@ -0,0 +1,248 @@
+import sqlite3
+
+from memory import MemoryConnection, MemoryNode, _id_sort_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    content_cf TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node_tags (
+    node_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (node_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_node_tags_tag ON node_tags(tag);
+CREATE TABLE IF NOT EXISTS connections (
+    from_id TEXT NOT NULL,
+    to_id TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_connections_from ON connections(from_id);
+CREATE INDEX IF NOT EXISTS idx_connections_to ON connections(to_id);
+"""
+
+
+class SqliteMemory:
+    """
+    SQLite-backed drop-in for Memory.
+
+    Every mutation persists immediately inside a transaction, recall goes
+    through B-tree indexes, and startup needs no re-parse of a JSON
+    snapshot — useful once the memory grows past what full-file rewrites
+    handle comfortably. Selected in bront with BRONT_MEMORY_BACKEND=sqlite.
+    """
+
+    def __init__(self, filepath: str = "bront_memory.db"):
+        self.filepath = filepath
+        self._conn = sqlite3.connect(filepath)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        row = self._conn.execute(
+            "SELECT MAX(CAST(id AS INTEGER)) FROM nodes"
+        ).fetchone()
+        self._next_id = (row[0] + 1) if row[0] is not None else 0
+
+    def next_id(self) -> str:
+        """Mint a fresh node ID that can never collide with an existing one."""
+        node_id = str(self._next_id)
+        self._next_id += 1
+        return node_id
+
+    def new_node(self, content: str, tags: list[str]) -> MemoryNode:
+        """Create, store, and return a node with a freshly minted ID."""
+        node = MemoryNode(self.next_id(), content, tags)
+        self.add_node(node)
+        return node
+
+    def add_node(self, node: MemoryNode) -> None:
+        """Add a node to the memory."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO nodes (id, content, content_cf) VALUES (?, ?, ?)",
+                (node.id, node.content, node.content_casefold),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO node_tags (node_id, tag) VALUES (?, ?)",
+                [(node.id, tag) for tag in node.tags],
+            )
+
+    def get_node(self, node_id: str) -> "MemoryNode | None":
+        """Look up a node by its ID."""
+        row = self._conn.execute(
+            "SELECT id, content FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return MemoryNode(id=row[0], content=row[1], tags=self._tags_of(row[0]))
+
+    def _tags_of(self, node_id: str) -> list[str]:
+        return [
+            r[0]
+            for r in self._conn.execute(
+                "SELECT tag FROM node_tags WHERE node_id = ?", (node_id,)
+            )
+        ]
+
+    def ids_matching_content(self, pattern: str) -> set[str]:
+        """
+        Return the IDs of nodes whose content contains the given pattern,
+        case-insensitively.
+        """
+        escaped = (
+            pattern.casefold()
+            .replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+        )
+        return {
+            r[0]
+            for r in self._conn.execute(
+                "SELECT id FROM nodes WHERE content_cf LIKE ? ESCAPE '\\'",
+                (f"%{escaped}%",),
+            )
+        }
+
+    def ids_with_any_tag(self, tags: list[str]) -> set[str]:
+        """Return the IDs of nodes carrying at least one of the given tags."""
+        if not tags:
+            return set()
+        placeholders = ",".join("?" * len(tags))
+        return {
+            r[0]
+            for r in self._conn.execute(
+                f"SELECT DISTINCT node_id FROM node_tags WHERE tag IN ({placeholders})",
+                tags,
+            )
+        }
+
+    def remove_nodes(self, ids: set[str]) -> int:
+        """Remove the given nodes and any connections touching them."""
+        ids = {
+            r[0]
+            for r in self._conn.execute(
+                "SELECT id FROM nodes WHERE id IN ({})".format(
+                    ",".join("?" * len(ids))
+                ),
+                list(ids),
+            )
+        } if ids else set()
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        id_list = list(ids)
+        with self._conn:
+            self._conn.execute(
+                f"DELETE FROM nodes WHERE id IN ({placeholders})", id_list
+            )
+            self._conn.execute(
+                f"DELETE FROM node_tags WHERE node_id IN ({placeholders})", id_list
+            )
+            self._conn.execute(
+                f"DELETE FROM connections WHERE from_id IN ({placeholders})"
+                f" OR to_id IN ({placeholders})",
+                id_list + id_list,
+            )
+        return len(ids)
+
+    def add_connection(self, connection: MemoryConnection) -> None:
+        """Add a connection between nodes in the memory."""
+        # Make sure both nodes exist before adding the connection
+        existing = self._conn.execute(
+            "SELECT COUNT(*) FROM nodes WHERE id IN (?, ?)",
+            (connection.from_id, connection.to_id),
+        ).fetchone()[0]
+        expected = 1 if connection.from_id == connection.to_id else 2
+        if existing < expected:
+            raise ValueError("Both nodes must exist in memory to create a connection.")
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO connections (from_id, to_id, type) VALUES (?, ?, ?)",
+                (connection.from_id, connection.to_id, connection.type),
+            )
+
+    def remove_connections(
+        self, from_id: str, to_id: str, connection_type: str = ""
+    ) -> int:
+        """
+        Remove connections from one node to another, optionally filtered by
+        type. Returns the number of connections removed.
+        """
+        query = "DELETE FROM connections WHERE from_id = ? AND to_id = ?"
+        params = [from_id, to_id]
+        if connection_type:
+            query += " AND type = ?"
+            params.append(connection_type)
+        with self._conn:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount
+
+    def get_tags(self) -> list[str]:
+        """Get all unique tags from the memory nodes."""
+        return [r[0] for r in self._conn.execute("SELECT DISTINCT tag FROM node_tags")]
+
+    def recall(self, tags: list[str]) -> list[tuple]:
+        """
+        Recall nodes that match the given tags.
+
+        Same result shape as Memory.recall: (node, is_direct_match,
+        connections) tuples, where connections only carry entries for
+        related (non-direct) nodes.
+        """
+        matched_ids = self.ids_with_any_tag(tags)
+        # Sort the matched set back into chronological order; set iteration
+        # order is hash-randomized.
+        ordered_ids = sorted(matched_ids, key=_id_sort_key)
+        result = [(self.get_node(node_id), True, []) for node_id in ordered_ids]
+
+        related_nodes: dict[str, list] = {}
+        for node_id in ordered_ids:
+            for from_id, to_id, conn_type in self._conn.execute(
+                "SELECT from_id, to_id, type FROM connections"
+                " WHERE from_id = ? OR to_id = ?",
+                (node_id, node_id),
+            ):
+                other_id = to_id if from_id == node_id else from_id
+                if other_id in matched_ids:
+                    continue
+                related_nodes.setdefault(other_id, []).append((conn_type, node_id))
+
+        for node_id, connections in related_nodes.items():
+            node = self.get_node(node_id)
+            if node is not None:
+                result.append((node, False, connections))
+        return result
+
+    @property
+    def nodes(self) -> list[MemoryNode]:
+        """All nodes, materialized for API parity with Memory."""
+        return [
+            MemoryNode(id=r[0], content=r[1], tags=self._tags_of(r[0]))
+            for r in self._conn.execute("SELECT id, content FROM nodes")
+        ]
+
+    @property
+    def connections(self) -> list[MemoryConnection]:
+        """All connections, materialized for API parity with Memory."""
+        return [
+            MemoryConnection(from_id=r[0], to_id=r[1], type=r[2])
+            for r in self._conn.execute("SELECT from_id, to_id, type FROM connections")
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of nodes in memory."""
+        return self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def __iter__(self):
+        """Make SqliteMemory iterable over nodes."""
+        return iter(self.nodes)
+
+    def save_to_file(self, filepath: str, fsync: bool = True) -> None:
+        """Flush pending state; SQLite already persisted each mutation."""
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()